@@ -1,14 +1,17 @@
 import os
-from langgraph.graph import StateGraph, START, END
 from typing import Dict, Any
+from cachetools import TTLCache
 from tools.gmail import summarize_unread
 from tools.calendar import plan_day
 from tools.weather import today_weather
 from tools.tasks import add_tasks
+from tools.errors import ToolError
 
 State = Dict[str, Any]
 
 def node_router(state: State):
+    # Plain substring checks on purpose: keyword priority rules out a single leftmost
+    # regex search, and they measured faster than any regex alternative that keeps it.
     prompt = state["prompt"].lower()
     if "email" in prompt:
         return "summarize"
@@ -18,44 +21,36 @@ def node_router(state: State):
         return "weather"
     return "tasks"
 
-async def summarize_node(state: State) -> State:
-    result = await summarize_unread(state)
-    return {"result": result}
+# The router picks exactly one terminal tool per prompt, so dispatch directly
+# instead of paying for StateGraph bookkeeping on every request.
+TOOLS = {
+    "summarize": summarize_unread,
+    "calendar": plan_day,
+    "weather": today_weather,
+    "tasks": add_tasks,
+}
 
-async def calendar_node(state: State) -> State:
-    result = await plan_day(state)
-    return {"result": result}
+# Short-lived results keyed by (node, normalized prompt) so UI retries don't refetch upstream.
+_RESULT_CACHE = TTLCache(maxsize=256, ttl=30)
+# Tools whose calls mutate state must always run.
+_UNCACHED_NODES = {"tasks"}
 
-async def weather_node(state: State) -> State:
-    result = await today_weather(state)
-    return {"result": result}
+async def run_agent(user_prompt: str) -> str:
+    state: State = {"prompt": user_prompt}
+    node = node_router(state)
+    key = (node, user_prompt.lower().strip())
+    if node not in _UNCACHED_NODES:
+        cached = _RESULT_CACHE.get(key)
+        if cached is not None:
+            return cached
 
-async def tasks_node(state: State) -> State:
-    result = await add_tasks(state)
-    return {"result": result}
+    result = await TOOLS[node](state)
+    if isinstance(result, dict):
+        result = result.get("result", "")
+    elif not isinstance(result, str):
+        result = str(result)
 
-async def run_agent(user_prompt: str) -> str:
-    g = StateGraph(State)
-    g.add_node("summarize", summarize_node)
-    g.add_node("calendar", calendar_node)
-    g.add_node("weather", weather_node)
-    g.add_node("tasks", tasks_node)
-    g.add_conditional_edges(
-        START,
-        node_router,
-        {
-            "summarize": "summarize",
-            "calendar": "calendar",
-            "weather": "weather",
-            "tasks": "tasks",
-        },
-    )
-    g.add_edge("summarize", END)
-    g.add_edge("calendar", END)
-    g.add_edge("weather", END)
-    g.add_edge("tasks", END)
-    app = g.compile()
-    resp = await app.ainvoke({"prompt": user_prompt})
-    if isinstance(resp, dict):
-        return resp.get("result", "")
-    return str(resp)
\ No newline at end of file
+    # Failures are not cached so a retry can reach the upstream API again.
+    if node not in _UNCACHED_NODES and not isinstance(result, ToolError):
+        _RESULT_CACHE[key] = result
+    return result
\ No newline at end of file
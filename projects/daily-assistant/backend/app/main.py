@@ -1,11 +1,31 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from fastapi import FastAPI
 from pydantic import BaseModel
 from graph import run_agent
+from tools.tasks import flush_tasks
 
 app = FastAPI(title="AI Daily Assistant")
 
+# Gmail, Calendar, FMI and tasks.json calls all go through asyncio.to_thread,
+# which uses the loop's default executor (min(32, cpus + 4) threads otherwise).
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "64"))
+
+
+@app.on_event("startup")
+async def _tune_threadpool():
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=THREADPOOL_SIZE))
+
+
+@app.on_event("shutdown")
+async def _flush_tasks():
+    # tasks.json is written in the background; don't drop saves already acknowledged to the user.
+    await flush_tasks()
+
 class Query(BaseModel):
     prompt: str
 
@@ -16,5 +36,5 @@ async def agent_endpoint(q: Query):
 
 
 @app.get("/health")
-def health():
+async def health():
     return {"ok": True, "time": datetime.now().isoformat()}
\ No newline at end of file
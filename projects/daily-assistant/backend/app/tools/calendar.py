@@ -1,14 +1,15 @@
 import asyncio
 import os
+import sys
 import datetime as dt
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from dateutil import tz
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
+
+from tools.errors import ToolError
+from tools.google_client import GoogleService
 
 CAL_SCOPES = ["https://www.googleapis.com/auth/calendar.readonly"]
 
@@ -18,27 +19,28 @@ DEFAULT_TZ = os.getenv("LOCAL_TZ", "Europe/Helsinki")
 
 LOOKAHEAD_HOURS = int(os.getenv("CAL_LOOKAHEAD_HOURS", "24"))
 
+TOKEN_PATH = os.getenv("GCAL_TOKEN", "token_calendar.json")
 
-def _get_creds() -> Credentials:
-    """
-    Loads/refreshes OAuth credentials for Calendar.
-    Use a separate token file so scopes don't collide with Gmail unless you unify them.
-    """
-    token_path = os.getenv("GCAL_TOKEN", "token_calendar.json")
-    creds: Optional[Credentials] = None
-    if os.path.exists(token_path):
-        creds = Credentials.from_authorized_user_file(token_path, CAL_SCOPES)
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            # credentials.json should be in your project root unless you set an env var for path
-            cred_path = os.getenv("GOOGLE_CREDENTIALS", "credentials.json")
-            flow = InstalledAppFlow.from_client_secrets_file(cred_path, CAL_SCOPES)
-            creds = flow.run_local_server(port=0)
-        with open(token_path, "w") as f:
-            f.write(creds.to_json())
-    return creds
+# Separate token file so scopes don't collide with Gmail unless you unify them.
+# credentials.json should be in your project root unless you set an env var for path.
+_CALENDAR = GoogleService(
+    "calendar",
+    "v3",
+    CAL_SCOPES,
+    TOKEN_PATH,
+    os.getenv("GOOGLE_CREDENTIALS", "credentials.json"),
+)
+
+
+def _list_events(time_min: str, time_max: str) -> Dict[str, Any]:
+    return _CALENDAR.service().events().list(
+        calendarId=CALENDAR_ID,
+        timeMin=time_min,
+        timeMax=time_max,
+        singleEvents=True,
+        orderBy="startTime",
+        maxResults=100,
+    ).execute()
 
 
 def _iso(dt_naive_utc: dt.datetime) -> str:
@@ -48,8 +50,29 @@ def _iso(dt_naive_utc: dt.datetime) -> str:
     return dt_naive_utc.astimezone(dt.timezone.utc).isoformat().replace("+00:00", "Z")
 
 
-def _format_time_span(start: dt.datetime, end: dt.datetime, local_tz: str) -> str:
-    zone = tz.gettz(local_tz)
+@lru_cache(maxsize=16)
+def _zone(name: str) -> Optional[dt.tzinfo]:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        # No system tz database (Windows, slim images) or an unknown name: dateutil ships
+        # its own zone data and returns None (local time) for unknown names, as before.
+        from dateutil import tz
+
+        return tz.gettz(name)
+
+
+if sys.version_info >= (3, 11):
+    # fromisoformat understands the trailing 'Z' natively
+    _iso_parse = dt.datetime.fromisoformat
+else:
+    def _iso_parse(value: str) -> dt.datetime:
+        if value.endswith("Z"):
+            value = value[:-1] + "+00:00"
+        return dt.datetime.fromisoformat(value)
+
+
+def _format_time_span(start: dt.datetime, end: dt.datetime, zone: Optional[dt.tzinfo]) -> str:
     s = start.astimezone(zone)
     e = end.astimezone(zone)
     return f"{s:%H:%M}–{e:%H:%M}"
@@ -59,17 +82,20 @@ def _summarize_events(items: List[Dict[str, Any]], local_tz: str) -> str:
     if not items:
         return "No events for today. 🗓️"
 
-    zone = tz.gettz(local_tz)
+    zone = _zone(local_tz)
     lines = []
-    for ev in items[:10]:
+    first_parsed: Optional[dt.datetime] = None
+    for i, ev in enumerate(items[:10]):
         start_raw = ev.get("start", {})
         end_raw = ev.get("end", {})
         title = ev.get("summary", "(no title)")
         loc = ev.get("location")
         if "dateTime" in start_raw and "dateTime" in end_raw:
-            s = dt.datetime.fromisoformat(start_raw["dateTime"].replace("Z", "+00:00"))
-            e = dt.datetime.fromisoformat(end_raw["dateTime"].replace("Z", "+00:00"))
-            span = _format_time_span(s, e, local_tz)
+            s = _iso_parse(start_raw["dateTime"])
+            e = _iso_parse(end_raw["dateTime"])
+            if i == 0:
+                first_parsed = s
+            span = _format_time_span(s, e, zone)
             suffix = f" @ {loc}" if loc else ""
             lines.append(f"{span} — {title}{suffix}")
         else:
@@ -77,22 +103,27 @@ def _summarize_events(items: List[Dict[str, Any]], local_tz: str) -> str:
             the_date = start_raw.get("date")
             if the_date:
                 d_obj = dt.datetime.fromisoformat(the_date)
+                if i == 0:
+                    first_parsed = d_obj
                 d_local = d_obj.replace(tzinfo=dt.timezone.utc).astimezone(zone)
                 lines.append(f"All day — {title} ({d_local:%Y-%m-%d})")
             else:
                 lines.append(f"{title}")
 
-    # Top summary
-    first_start = items[0].get("start", {}).get("dateTime") or items[0].get("start", {}).get("date")
+    # Top summary; reuses the first event's start parsed in the loop when available
+    if first_parsed is None:
+        first_start = items[0].get("start", {}).get("dateTime") or items[0].get("start", {}).get("date")
+        if first_start:
+            first_parsed = _iso_parse(first_start)
     top = f"{len(items)} event(s) today"
-    if first_start:
-        top += f"; first starts at {dt.datetime.fromisoformat(first_start.replace('Z','+00:00')).astimezone(zone):%H:%M}"
+    if first_parsed is not None:
+        top += f"; first starts at {first_parsed.astimezone(zone):%H:%M}"
     return top + ". " + " | ".join(lines)
 
 
 def _plan_day_sync(prompt: str, local_tz: str) -> str:
     # Compute today's window in UTC
-    zone = tz.gettz(local_tz)
+    zone = _zone(local_tz)
     now_local = dt.datetime.now(zone)
     start_local = now_local.replace(hour=0, minute=0, second=0, microsecond=0)
     # look until end of day or configured lookahead
@@ -101,17 +132,7 @@ def _plan_day_sync(prompt: str, local_tz: str) -> str:
     start_utc = start_local.astimezone(dt.timezone.utc).replace(tzinfo=None)
     end_utc = end_local.astimezone(dt.timezone.utc).replace(tzinfo=None)
 
-    creds = _get_creds()
-    service = build("calendar", "v3", credentials=creds)
-
-    events_result = service.events().list(
-        calendarId=CALENDAR_ID,
-        timeMin=_iso(start_utc),
-        timeMax=_iso(end_utc),
-        singleEvents=True,
-        orderBy="startTime",
-        maxResults=100,
-    ).execute()
+    events_result = _CALENDAR.call(_list_events, _iso(start_utc), _iso(end_utc))
 
     items: List[Dict[str, Any]] = events_result.get("items", [])
     return _summarize_events(items, local_tz)
@@ -129,9 +150,9 @@ async def plan_day(state: Dict[str, Any]) -> str:
         return await asyncio.to_thread(_plan_day_sync, prompt, local_tz)
     except HttpError as e:
         # Common cause: 403 due to consent screen / tester list
-        return (
+        return ToolError(
             "Calendar error: access denied (check OAuth consent, add your account as a Test user, "
             "enable Calendar API, then delete token_calendar.json and retry)."
         )
     except Exception as e:
-        return f"Calendar error: {e}"
\ No newline at end of file
+        return ToolError(f"Calendar error: {e}")
\ No newline at end of file
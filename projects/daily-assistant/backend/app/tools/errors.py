@@ -0,0 +1,6 @@
+class ToolError(str):
+    """
+    Reply text for a failed tool call.
+    Behaves like a plain string for the API response, but lets run_agent
+    tell failures apart so they are never cached.
+    """
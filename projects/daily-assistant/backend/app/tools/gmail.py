@@ -3,34 +3,26 @@ import asyncio
 import datetime as dt
 import os
 from collections import Counter
-from typing import Any, Dict, List, Optional
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
 
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
+
+from tools.errors import ToolError
+from tools.google_client import GoogleService
 
 # Read-only Gmail scope
 SCOPES = ["https://www.googleapis.com/auth/gmail.readonly"]
 
 GMAIL_QUERY = os.getenv("GMAIL_QUERY", "is:unread in:inbox newer_than:2d")
 GMAIL_MAX_RESULTS = int(os.getenv("GMAIL_MAX_RESULTS", "25"))
+# Gmail accepts at most 100 calls per HTTP batch request
+GMAIL_BATCH_SIZE = 100
+# Set GMAIL_USE_BATCH=0 to fetch messages with parallel GETs instead of HTTP batches
+GMAIL_USE_BATCH = os.getenv("GMAIL_USE_BATCH", "1") != "0"
+GMAIL_CONCURRENCY = int(os.getenv("GMAIL_CONCURRENCY", "8"))
 
-
-def _get_creds() -> Credentials:
-    creds = None
-    if os.path.exists("token.json"):
-        creds = Credentials.from_authorized_user_file("token.json", SCOPES)
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file("credentials.json", SCOPES)
-            creds = flow.run_local_server(port=0)
-        with open("token.json", "w") as token:
-            token.write(creds.to_json())
-    return creds
+_GMAIL = GoogleService("gmail", "v1", SCOPES, "token.json", "credentials.json")
 
 
 def _gmail_list_messages(service, query: str, max_results: int) -> List[str]:
@@ -42,11 +34,29 @@ def _gmail_get_message(service, msg_id: str) -> Dict[str, Any]:
     return service.users().messages().get(userId="me", id=msg_id, format="metadata", metadataHeaders=["From","Subject","Date"]).execute()
 
 
-def _parse_header(headers: List[Dict[str, str]], name: str) -> Optional[str]:
-    for h in headers:
-        if h.get("name") == name:
-            return h.get("value")
-    return None
+def _gmail_get_messages(service, msg_ids: List[str]) -> List[Dict[str, Any]]:
+    """Fetches metadata for all ids with one HTTP batch per GMAIL_BATCH_SIZE ids, keeping input order."""
+    results: Dict[str, Dict[str, Any]] = {}
+    errors: List[Exception] = []
+
+    def _on_response(request_id: str, response: Dict[str, Any], exception: Optional[Exception]) -> None:
+        if exception is not None:
+            errors.append(exception)
+        else:
+            results[request_id] = response
+
+    for i in range(0, len(msg_ids), GMAIL_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=_on_response)
+        for mid in msg_ids[i:i + GMAIL_BATCH_SIZE]:
+            batch.add(
+                service.users().messages().get(userId="me", id=mid, format="metadata", metadataHeaders=["From","Subject","Date"]),
+                request_id=mid,
+            )
+        batch.execute()
+        if errors:
+            raise errors[0]
+
+    return [results[mid] for mid in msg_ids if mid in results]
 
 
 def _clean_sender(sender_val: str) -> str:
@@ -61,30 +71,31 @@ def _summarize_messages(meta_messages: List[Dict[str, Any]]) -> str:
     if not meta_messages:
         return "No unread emails 🎉"
 
-    senders = []
+    sender_counter: Counter = Counter()
     subjects = []
-    times: List[dt.datetime] = []
+    latest: Optional[dt.datetime] = None
 
     for m in meta_messages:
         headers = m.get("payload", {}).get("headers", [])
-        s_from = _clean_sender(_parse_header(headers, "From") or "")
-        s_subj = (_parse_header(headers, "Subject") or "").strip()
-        s_date = _parse_header(headers, "Date") or ""
-        senders.append(s_from)
+        # First occurrence wins for repeated headers, as the old linear scan did
+        hdr = {h.get("name"): h.get("value") for h in reversed(headers)}
+        s_from = _clean_sender(hdr.get("From") or "")
+        s_subj = (hdr.get("Subject") or "").strip()
+        s_date = hdr.get("Date") or ""
+        sender_counter[s_from] += 1
         if s_subj:
             subjects.append(s_subj)
         try:
-            from email.utils import parsedate_to_datetime
             d = parsedate_to_datetime(s_date)
             if d.tzinfo:
                 d = d.astimezone(dt.timezone.utc).replace(tzinfo=None)
-            times.append(d)
+            if latest is None or d > latest:
+                latest = d
         except Exception:
             pass
 
     count = len(meta_messages)
-    top_senders = ", ".join([f"{name}×{n}" for name, n in Counter(senders).most_common(3)])
-    latest = max(times) if times else None
+    top_senders = ", ".join([f"{name}×{n}" for name, n in sender_counter.most_common(3)])
     latest_str = latest.isoformat(timespec="minutes") + "Z" if latest else "unknown time"
 
     preview = "; ".join(subjects[:3]) if subjects else "no subjects"
@@ -92,12 +103,11 @@ def _summarize_messages(meta_messages: List[Dict[str, Any]]) -> str:
     return f"{count} unread email(s). Top senders: {top_senders}. Latest around {latest_str}. Subjects: {preview}"
 
 
-def _summarize_unread_sync(prompt: str) -> str:
+def _list_unread_sync(prompt: str) -> Tuple[Any, List[str]]:
     """
     Synchronous core:
     - Builds Gmail service
-    - Lists unread messages with query (optionally adjusted by prompt)
-    - Returns a compact summary string
+    - Lists unread message ids with query (optionally adjusted by prompt)
     """
     query = GMAIL_QUERY
     if "24h" in prompt or "day" in prompt:
@@ -105,13 +115,37 @@ def _summarize_unread_sync(prompt: str) -> str:
     elif "week" in prompt or "7 days" in prompt:
         query = "is:unread in:inbox newer_than:7d"
 
-    creds = _get_creds()
-    service = build("gmail", "v1", credentials=creds)
-    ids = _gmail_list_messages(service, query, GMAIL_MAX_RESULTS)
+    service = _GMAIL.service()
+    return service, _GMAIL.call(_gmail_list_messages, service, query, GMAIL_MAX_RESULTS)
+
+
+async def _gmail_get_messages_parallel(service, msg_ids: List[str]) -> List[Dict[str, Any]]:
+    """Overlaps the per-message GETs on the thread pool, bounded to respect Gmail quota."""
+    sem = asyncio.Semaphore(GMAIL_CONCURRENCY)
+
+    async def _fetch(mid: str) -> Dict[str, Any]:
+        async with sem:
+            return await asyncio.to_thread(_gmail_get_message, service, mid)
+
+    return list(await asyncio.gather(*(_fetch(mid) for mid in msg_ids)))
+
+
+async def _summarize_unread(prompt: str) -> str:
+    """
+    - Lists unread messages
+    - Fetches their metadata (HTTP batch, or parallel GETs as a fallback)
+    - Returns a compact summary string
+    """
+    service, ids = await asyncio.to_thread(_list_unread_sync, prompt)
     if not ids:
         return "No unread emails 🎉"
 
-    meta = [_gmail_get_message(service, mid) for mid in ids]
+    if GMAIL_USE_BATCH:
+        meta = await asyncio.to_thread(_GMAIL.call, _gmail_get_messages, service, ids)
+    else:
+        # One guard around the whole fetch rather than per message
+        with _GMAIL.guard():
+            meta = await _gmail_get_messages_parallel(service, ids)
     return _summarize_messages(meta)
 
 
@@ -123,8 +157,8 @@ async def summarize_unread(state: Dict[str, Any]) -> str:
     """
     prompt = (state.get("prompt") or "").lower()
     try:
-        return await asyncio.to_thread(_summarize_unread_sync, prompt)
+        return await _summarize_unread(prompt)
     except HttpError as e:
-        return f"Failed to access Gmail API: {e}"
+        return ToolError(f"Failed to access Gmail API: {e}")
     except Exception as e:
-        return f"Email summary error: {e}"
\ No newline at end of file
+        return ToolError(f"Email summary error: {e}")
@@ -0,0 +1,120 @@
+# tools/google_client.py
+import os
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Iterator, List, Optional, TypeVar
+
+from google.auth.exceptions import RefreshError
+from googleapiclient.errors import HttpError
+
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+
+T = TypeVar("T")
+
+
+class GoogleService:
+    """
+    Process-wide client for one Google API and its token file.
+    - Credentials and the discovery service are built once, under a lock
+    - Tokens refreshed by AuthorizedHttp are written back to the token file
+    - A RefreshError, or a 401/403 that AuthorizedHttp's own refresh-and-retry
+      couldn't fix, drops both so the next call reloads the token file
+    """
+
+    def __init__(self, api: str, version: str, scopes: List[str], token_path: str, credentials_path: str):
+        self.api = api
+        self.version = version
+        self.scopes = scopes
+        self.token_path = token_path
+        self.credentials_path = credentials_path
+        # Reentrant: service() loads credentials while holding it.
+        self._lock = threading.RLock()
+        self._creds: Optional["Credentials"] = None
+        self._service: Any = None
+        # Access token currently stored in token_path.
+        self._saved_token: Optional[str] = None
+        # One AuthorizedHttp per worker thread so keep-alive connections are reused.
+        self._local = threading.local()
+
+    def _save_creds(self, creds: "Credentials") -> None:
+        """Writes the token file only when the access token differs from what is on disk."""
+        if creds.token == self._saved_token:
+            return
+        with open(self.token_path, "w") as f:
+            f.write(creds.to_json())
+        self._saved_token = creds.token
+
+    def _load_creds(self) -> "Credentials":
+        # Imported here so workers that never touch Google APIs skip the import cost.
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
+        creds: Optional["Credentials"] = None
+        if os.path.exists(self.token_path):
+            creds = Credentials.from_authorized_user_file(self.token_path, self.scopes)
+            self._saved_token = creds.token
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                creds.refresh(Request())
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file(self.credentials_path, self.scopes)
+                creds = flow.run_local_server(port=0)
+            self._save_creds(creds)
+        return creds
+
+    def service(self) -> Any:
+        with self._lock:
+            if self._service is None:
+                import google_auth_httplib2
+                import httplib2
+                from googleapiclient.discovery import build
+                from googleapiclient.http import HttpRequest
+
+                creds = self._creds = self._load_creds()
+
+                # httplib2 is not thread-safe, so each thread gets its own authorized Http.
+                def _request_builder(http, *args, **kwargs):
+                    local_http = getattr(self._local, "http", None)
+                    if local_http is None or local_http.credentials is not creds:
+                        local_http = self._local.http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+                    return HttpRequest(local_http, *args, **kwargs)
+
+                self._service = build(
+                    self.api, self.version, credentials=creds, requestBuilder=_request_builder, cache_discovery=False
+                )
+            return self._service
+
+    def reset(self) -> None:
+        """Forgets the cached credentials and service; the next call reloads the token file."""
+        with self._lock:
+            self._creds = None
+            self._service = None
+            self._saved_token = None
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """
+        Wraps a group of calls made with an already built service():
+        resets on auth failures and keeps the token file in sync with the cached credentials.
+        """
+        creds = self._creds
+        try:
+            yield
+        except RefreshError:
+            self.reset()
+            raise
+        except HttpError as e:
+            if e.resp.status in (401, 403):
+                self.reset()
+            raise
+        with self._lock:
+            if creds is not None and creds is self._creds:
+                self._save_creds(creds)
+
+    def call(self, fn: Callable[..., T], *args: Any) -> T:
+        """Runs fn (which uses service()) inside guard()."""
+        self.service()
+        with self.guard():
+            return fn(*args)
@@ -1,13 +1,39 @@
 import asyncio
 import json
+import logging
 import os
 import re
+import tempfile
 import uuid
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+import orjson
+
 TASKS_PATH = os.getenv("TASKS_PATH", "tasks.json")
 
+logger = logging.getLogger(__name__)
+
+# Read once at import (os.umask can only be queried by setting it, which isn't thread-safe later).
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# Compiled once; these run on every command.
+_RE_PRIO = re.compile(r"\bp\s*([1-3])\b")
+_RE_PRIO2 = re.compile(r"priority\s*([1-3])")
+_RE_DATE = re.compile(r"\b(20\d{2}-\d{2}-\d{2})\b")
+_RE_STRIP = re.compile(r"^\s*(add|todo|task|remember|note|create|append)[:\s,-]*", re.I)
+_RE_DONE = re.compile(r"\b(done|complete|finish|close)\s+(\d+)\b", re.I)
+_RE_MARK_DONE = re.compile(r"\bmark\s+(\d+)\s+done\b", re.I)
+_RE_REMOVE = re.compile(r"\b(remove|delete)\s+(\d+)\b", re.I)
+
+_RE_INTENT_LIST = re.compile(r"\b(list|show|tasks)\b")
+_RE_INTENT_ADD = re.compile(r"\b(add|todo|task|remember|note|create|append)\b")
+_RE_INTENT_DONE = re.compile(r"\b(done|complete|finish|close|mark\s+\d+\s+done)\b")
+_RE_INTENT_REMOVE = re.compile(r"\b(remove|delete)\b")
+_RE_INTENT_CLEAR = re.compile(r"\s*clear\s*")
+_RE_INTENT_NEXT = re.compile(r"\bnext\b")
+
 
 # ---------- storage ----------
 
@@ -25,16 +51,79 @@ def _load_tasks_sync() -> List[Dict[str, Any]]:
 
 
 def _save_tasks_sync(tasks: List[Dict[str, Any]]) -> None:
-    with open(TASKS_PATH, "w", encoding="utf-8") as f:
-        json.dump(tasks, f, ensure_ascii=False, indent=2)
+    # Write to a temp file and rename so a crash never leaves a half-written tasks.json.
+    # The temp name is unique so several workers sharing TASKS_PATH never write the same temp file.
+    data = orjson.dumps(tasks, option=orjson.OPT_INDENT_2)
+    f = tempfile.NamedTemporaryFile(dir=os.path.dirname(TASKS_PATH) or ".", delete=False)
+    try:
+        with f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # NamedTemporaryFile is created 0600; keep the existing file's mode, or the umask default.
+        try:
+            mode = os.stat(TASKS_PATH).st_mode & 0o777
+        except OSError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(f.name, mode)
+        os.replace(f.name, TASKS_PATH)
+    except BaseException:
+        os.unlink(f.name)
+        raise
+
+
+# In-memory copy of tasks.json. It is re-read only when the file's mtime changes,
+# so several workers sharing TASKS_PATH still see each other's edits.
+_CACHE: Optional[List[Dict[str, Any]]] = None
+# st_mtime_ns of TASKS_PATH that _CACHE corresponds to (None: file missing).
+_CACHE_MTIME: Optional[int] = None
+# Serializes commands so read-modify-write on _CACHE stays consistent.
+_LOCK = asyncio.Lock()
+# Most recent background write; each write waits for the previous one so the file never goes backwards.
+_PENDING_SAVE: Optional["asyncio.Task[None]"] = None
+
+
+def _mtime_ns() -> Optional[int]:
+    try:
+        return os.stat(TASKS_PATH).st_mtime_ns
+    except OSError:
+        return None
+
+
+async def _write_after(prev: Optional["asyncio.Task[None]"], tasks: List[Dict[str, Any]]) -> None:
+    global _CACHE_MTIME
+    if prev is not None:
+        await prev
+    try:
+        await asyncio.to_thread(_save_tasks_sync, tasks)
+        # Our own write shouldn't force a re-read
+        _CACHE_MTIME = _mtime_ns()
+    except Exception:
+        # The in-memory list stays authoritative; the next successful save catches the file up.
+        logger.exception("Failed to write %s", TASKS_PATH)
 
 
 async def load_tasks() -> List[Dict[str, Any]]:
-    return await asyncio.to_thread(_load_tasks_sync)
+    global _CACHE, _CACHE_MTIME
+    mtime = _mtime_ns()
+    if _CACHE is None or mtime != _CACHE_MTIME:
+        _CACHE = await asyncio.to_thread(_load_tasks_sync)
+        _CACHE_MTIME = mtime
+    return _CACHE
 
 
 async def save_tasks(tasks: List[Dict[str, Any]]) -> None:
-    await asyncio.to_thread(_save_tasks_sync, tasks)
+    """Updates the cache and writes to disk in the background so the reply isn't held up by file I/O."""
+    global _CACHE, _PENDING_SAVE
+    _CACHE = tasks
+    snapshot = [dict(t) for t in tasks]
+    _PENDING_SAVE = asyncio.create_task(_write_after(_PENDING_SAVE, snapshot))
+
+
+async def flush_tasks() -> None:
+    """Waits for queued background writes; call before the event loop shuts down."""
+    if _PENDING_SAVE is not None:
+        await _PENDING_SAVE
 
 
 # ---------- helpers ----------
@@ -59,7 +148,7 @@ def _format_list(tasks: List[Dict[str, Any]]) -> str:
 def _parse_priority(text: str) -> Optional[int]:
 
     text_l = text.lower()
-    m = re.search(r"\bp\s*([1-3])\b", text_l) or re.search(r"priority\s*([1-3])", text_l)
+    m = _RE_PRIO.search(text_l) or _RE_PRIO2.search(text_l)
     if m:
         return int(m.group(1))
     if "high" in text_l:
@@ -77,7 +166,7 @@ def _parse_due(text: str) -> Optional[str]:
         return "tomorrow"
     if "today" in t:
         return "today"
-    m = re.search(r"\b(20\d{2}-\d{2}-\d{2})\b", text)
+    m = _RE_DATE.search(text)
     if m:
         return m.group(1)
     return None
@@ -94,7 +183,7 @@ def _extract_titles_to_add(text: str) -> List[str]:
     t = text.strip()
 
     # strip leading verbs/keywords
-    t = re.sub(r"^\s*(add|todo|task|remember|note|create|append)[:\s,-]*", "", t, flags=re.I)
+    t = _RE_STRIP.sub("", t)
 
     parts = []
     for chunk in t.split(";"):
@@ -135,15 +224,16 @@ async def _cmd_add(text: str) -> str:
     due = _parse_due(text)
 
     tasks = await load_tasks()
+    now = _now_iso()
     for title in titles:
         tasks.append({
-            "id": str(uuid.uuid4()),
+            "id": uuid.uuid4().hex,
             "title": title,
             "done": False,
             "priority": prio,
             "due": due,
-            "created": _now_iso(),
-            "updated": _now_iso(),
+            "created": now,
+            "updated": now,
         })
     await save_tasks(tasks)
 
@@ -151,9 +241,9 @@ async def _cmd_add(text: str) -> str:
 
 
 async def _cmd_done(text: str) -> str:
-    m = re.search(r"\b(done|complete|finish|close)\s+(\d+)\b", text, flags=re.I)
+    m = _RE_DONE.search(text)
     if not m:
-        m = re.search(r"\bmark\s+(\d+)\s+done\b", text, flags=re.I)
+        m = _RE_MARK_DONE.search(text)
     if not m:
         return "Specify which task: e.g. 'done 2'."
 
@@ -170,7 +260,7 @@ async def _cmd_done(text: str) -> str:
 
 
 async def _cmd_remove(text: str) -> str:
-    m = re.search(r"\b(remove|delete)\s+(\d+)\b", text, flags=re.I)
+    m = _RE_REMOVE.search(text)
     if not m:
         return "Specify which task to remove: e.g. 'remove 3'."
     idx = int(m.group(2))
@@ -219,25 +309,28 @@ async def add_tasks(state: Dict[str, Any]) -> str:
     if not prompt:
         return "Try: 'add buy milk', 'list', 'done 2', 'remove 3', 'clear', or 'next'."
 
-    low = prompt.lower()
+    async with _LOCK:
+        return await _route(prompt)
 
-    # Route by intent
-    if re.search(r"\b(list|show|tasks)\b", low):
-        return await _cmd_list(prompt)
-
-    if re.search(r"\b(add|todo|task|remember|note|create|append)\b", low):
-        return await _cmd_add(prompt)
 
-    if re.search(r"\b(done|complete|finish|close|mark\s+\d+\s+done)\b", low):
-        return await _cmd_done(prompt)
+# Checked in order, first match wins. Separate searches with an early return beat a
+# single combined alternation here, since that has to scan every match to keep this priority.
+_INTENT_ROUTES = (
+    (_RE_INTENT_LIST.search, _cmd_list),
+    (_RE_INTENT_ADD.search, _cmd_add),
+    (_RE_INTENT_DONE.search, _cmd_done),
+    (_RE_INTENT_REMOVE.search, _cmd_remove),
+    (_RE_INTENT_CLEAR.fullmatch, _cmd_clear),
+    (_RE_INTENT_NEXT.search, _cmd_next),
+)
 
-    if re.search(r"\b(remove|delete)\b", low):
-        return await _cmd_remove(prompt)
 
-    if re.fullmatch(r"\s*clear\s*", low):
-        return await _cmd_clear(prompt)
+async def _route(prompt: str) -> str:
+    low = prompt.lower()
 
-    if re.search(r"\bnext\b", low):
-        return await _cmd_next(prompt)
+    # Route by intent
+    for matches, handler in _INTENT_ROUTES:
+        if matches(low):
+            return await handler(prompt)
 
-    return await _cmd_add(prompt)
\ No newline at end of file
+    return await _cmd_add(prompt)
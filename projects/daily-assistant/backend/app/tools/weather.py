@@ -1,24 +1,46 @@
-
+import asyncio
 import os
-from fmiopendata.wfs import download_stored_query
+from cachetools import TTLCache
+
+from tools.errors import ToolError
+
+# FMI observations refresh roughly every 10 minutes; keyed by city, holds the reply text.
+_WEATHER_CACHE = TTLCache(maxsize=64, ttl=300)
+
+def _download_observations(city):
+    # Imported lazily, and inside the worker thread so the first call doesn't block the event loop.
+    from fmiopendata.wfs import download_stored_query
+
+    return download_stored_query("fmi::observations::weather::cities::multipointcoverage", [f"place={city}"])
 
 async def today_weather(state):
    
-    if isinstance(state, dict):
-        wanted = state.get("place") or state.get("city")
-        if isinstance(wanted, str) and wanted.strip():
-            os.environ["DEFAULT_CITY"] = wanted.strip()
+    # Per-request city; never written back to os.environ so requests can't leak into each other.
+    wanted = (state.get("place") or state.get("city")) if isinstance(state, dict) else None
+    city = wanted.strip() if isinstance(wanted, str) and wanted.strip() else os.getenv("DEFAULT_CITY", "Lappeenranta")
+    cached = _WEATHER_CACHE.get(city)
+    if cached is not None:
+        return {"result": cached}
 
-    city = os.getenv("DEFAULT_CITY", "Lappeenranta")
-    result = download_stored_query("fmi::observations::weather::cities::multipointcoverage", [f"place={city}"])
+    result = await asyncio.to_thread(_download_observations, city)
     
     if not result or not getattr(result, "data", None):
-        return {"result": f"No weather data found for {city}"}
+        return {"result": ToolError(f"No weather data found for {city}")}
     
-    stations = list(result.data.keys())
-    last = stations[len(stations)-1]
-    station = next((s for s in result.data[last] if city.lower() in s.lower()), None)
+    # Latest observation time is the last key; no need to materialise the key list.
+    last = next(reversed(result.data))
+    observations = result.data[last]
+    city_l = city.lower()
+    station = None
+    for s in observations:
+        if city_l in s.lower():
+            station = s
+            break
+    if station is None:
+        return {"result": ToolError(f"No weather data found for {city}")}
     
-    data = result.data[last][station]
+    data = observations[station]
     tempr = data["Air temperature"]["value"]
-    return {"result": f"Temperature in {city} is {tempr} °C, wind speed is {data['Wind speed']['value']} m/s recorded at {last}"}
\ No newline at end of file
+    reply = f"Temperature in {city} is {tempr} °C, wind speed is {data['Wind speed']['value']} m/s recorded at {last}"
+    _WEATHER_CACHE[city] = reply
+    return {"result": reply}
\ No newline at end of file